@@ -7,17 +7,27 @@ Generates realistic transactions including fraud scenarios for demo
 
 import asyncio
 import random
-import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
 from typing import List, Dict
 import httpx
+import numpy as np
+import orjson
+
+def epoch_ns(timestamp: datetime) -> int:
+    """Epoch nanoseconds for a naive timestamp emitted with a "Z" suffix (treated as UTC)"""
+    return int(timestamp.replace(tzinfo=timezone.utc).timestamp()) * 10**9 + timestamp.microsecond * 1000
 
 class TransactionGenerator:
     """Generate realistic transactions for demo purposes"""
     
     def __init__(self):
         self.fraud_api_base = "http://localhost:8000"
-        self.client = httpx.AsyncClient()
+        self.client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
+            timeout=httpx.Timeout(10.0)
+        )
         
         # Demo accounts
         self.accounts = [
@@ -48,14 +58,23 @@ class TransactionGenerator:
             "clothing": {"min": 20.00, "max": 200.00, "frequency": 0.1},
             "pharmacy": {"min": 5.00, "max": 50.00, "frequency": 0.08}
         }
+        
+        # Precomputed category sampler for random.choices
+        self._categories = list(self.normal_patterns)
+        self._cum_weights = list(accumulate(p["frequency"] for p in self.normal_patterns.values()))
+        
+        # Column arrays for NumPy bulk generation
+        self._rng = np.random.default_rng()
+        frequencies = np.array([p["frequency"] for p in self.normal_patterns.values()])
+        self._freqs = frequencies / frequencies.sum()
+        self._min_amounts = np.array([p["min"] for p in self.normal_patterns.values()])
+        self._max_amounts = np.array([p["max"] for p in self.normal_patterns.values()])
     
-    def generate_normal_transaction(self, account: Dict) -> Dict:
+    def generate_normal_transaction(self, account: Dict, category: str = None, now: datetime = None) -> Dict:
         """Generate a normal, legitimate transaction"""
         # Choose merchant category based on frequency
-        category = random.choices(
-            list(self.normal_patterns.keys()),
-            weights=[p["frequency"] for p in self.normal_patterns.values()]
-        )[0]
+        if category is None:
+            category = random.choices(self._categories, cum_weights=self._cum_weights, k=1)[0]
         
         pattern = self.normal_patterns[category]
         merchant = random.choice(self.merchants[category])
@@ -65,7 +84,7 @@ class TransactionGenerator:
         hour = random.randint(7, 23)
         minute = random.randint(0, 59)
         
-        timestamp = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+        timestamp = (now or datetime.now()).replace(hour=hour, minute=minute, second=0, microsecond=0)
         
         return {
             "transactionId": random.randint(100000, 999999),
@@ -75,12 +94,49 @@ class TransactionGenerator:
             "toRoutingNum": "123456789",
             "amount": int(amount * 100),  # Convert to cents
             "timestamp": timestamp.isoformat() + "Z",
+            "ts_ns": epoch_ns(timestamp),
             "merchant": merchant,
             "category": category,
             "location": account["location"]
         }
     
-    def generate_fraud_scenario_1(self, account: Dict) -> Dict:
+    def generate_normal_batch(self, n: int) -> List[Dict]:
+        """Generate n normal transactions with vectorized NumPy draws"""
+        rng = self._rng
+        category_idx = rng.choice(len(self._categories), size=n, p=self._freqs)
+        account_idx = rng.integers(0, len(self.accounts), size=n)
+        merchant_draws = rng.random(size=n)
+        amounts = np.round(rng.uniform(self._min_amounts[category_idx], self._max_amounts[category_idx]), 2)
+        transaction_ids = rng.integers(100000, 1000000, size=n)
+        
+        # Normal business hours (7 AM - 11 PM), offset from one sampled midnight
+        midnight = np.datetime64(datetime.now().date(), 's')
+        offsets = rng.integers(7, 24, size=n) * 3600 + rng.integers(0, 60, size=n) * 60
+        times = midnight + offsets.astype('timedelta64[s]')
+        timestamps = np.datetime_as_string(times, unit='s')
+        timestamps_ns = times.astype('datetime64[ns]').astype(np.int64)
+        
+        transactions = []
+        for i in range(n):
+            category = self._categories[category_idx[i]]
+            merchants = self.merchants[category]
+            account = self.accounts[account_idx[i]]
+            transactions.append({
+                "transactionId": int(transaction_ids[i]),
+                "fromAccountNum": account["id"],
+                "fromRoutingNum": "883745000",
+                "toAccountNum": "9999999999",  # Merchant account
+                "toRoutingNum": "123456789",
+                "amount": int(amounts[i] * 100),  # Convert to cents
+                "timestamp": timestamps[i] + "Z",
+                "ts_ns": int(timestamps_ns[i]),
+                "merchant": merchants[int(merchant_draws[i] * len(merchants))],
+                "category": category,
+                "location": account["location"]
+            })
+        return transactions
+    
+    def generate_fraud_scenario_1(self, account: Dict, now: datetime = None) -> Dict:
         """High-value transaction from unusual location at suspicious time"""
         # Very high amount
         amount = round(random.uniform(2000.00, 5000.00), 2)
@@ -93,7 +149,7 @@ class TransactionGenerator:
         unusual_locations = ["Tokyo, Japan", "London, UK", "Moscow, Russia", "Lagos, Nigeria"]
         location = random.choice(unusual_locations)
         
-        timestamp = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+        timestamp = (now or datetime.now()).replace(hour=hour, minute=minute, second=0, microsecond=0)
         
         return {
             "transactionId": random.randint(100000, 999999),
@@ -103,16 +159,17 @@ class TransactionGenerator:
             "toRoutingNum": "987654321",
             "amount": int(amount * 100),
             "timestamp": timestamp.isoformat() + "Z",
+            "ts_ns": epoch_ns(timestamp),
             "merchant": "Electronics Store",
             "category": "electronics",
             "location": location,
             "fraud_type": "high_value_unusual_location"
         }
     
-    def generate_fraud_scenario_2(self, account: Dict) -> List[Dict]:
+    def generate_fraud_scenario_2(self, account: Dict, now: datetime = None) -> List[Dict]:
         """Rapid sequence of transactions (card skimming)"""
         transactions = []
-        base_time = datetime.now()
+        base_time = now or datetime.now()
         
         # 3-5 rapid transactions within 10 minutes
         num_transactions = random.randint(3, 5)
@@ -132,6 +189,7 @@ class TransactionGenerator:
                 "toRoutingNum": "555666777",
                 "amount": int(amount * 100),
                 "timestamp": timestamp.isoformat() + "Z",
+                "ts_ns": epoch_ns(timestamp),
                 "merchant": f"ATM Withdrawal #{i+1}",
                 "category": "atm",
                 "location": "Unknown Location",
@@ -141,7 +199,7 @@ class TransactionGenerator:
         
         return transactions
     
-    def generate_fraud_scenario_3(self, account: Dict) -> Dict:
+    def generate_fraud_scenario_3(self, account: Dict, now: datetime = None) -> Dict:
         """Round number transaction (money laundering pattern)"""
         # Exact round amounts
         round_amounts = [1000.00, 2000.00, 5000.00, 10000.00]
@@ -151,7 +209,7 @@ class TransactionGenerator:
         hour = random.randint(9, 17)
         minute = 0  # Exactly on the hour
         
-        timestamp = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+        timestamp = (now or datetime.now()).replace(hour=hour, minute=minute, second=0, microsecond=0)
         
         return {
             "transactionId": random.randint(100000, 999999),
@@ -161,6 +219,7 @@ class TransactionGenerator:
             "toRoutingNum": "111222333",
             "amount": int(amount * 100),
             "timestamp": timestamp.isoformat() + "Z",
+            "ts_ns": epoch_ns(timestamp),
             "merchant": "Cash Advance Service",
             "category": "financial",
             "location": account["location"],
@@ -171,10 +230,14 @@ class TransactionGenerator:
         """Send transaction to fraud detection API"""
         try:
             url = f"{self.fraud_api_base}/analyze"
-            response = await self.client.post(url, json=transaction)
+            response = await self.client.post(
+                url,
+                content=orjson.dumps(transaction),
+                headers={"content-type": "application/json"}
+            )
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 print(f"✅ Transaction {transaction['transactionId']} analyzed:")
                 print(f"   Fraud Score: {result['fraud_score']:.2f}")
                 print(f"   Risk Level: {result['risk_level']}")
@@ -191,6 +254,29 @@ class TransactionGenerator:
             print(f"❌ Error analyzing transaction: {str(e)}")
             return None
     
+    async def _worker(self, queue: asyncio.Queue):
+        """Drain the queue, sending each transaction for analysis"""
+        while True:
+            transaction = await queue.get()
+            try:
+                await self.send_transaction_for_analysis(transaction)
+            finally:
+                queue.task_done()
+    
+    async def send_transactions(self, transactions: List[Dict], num_workers: int = 16):
+        """Stream transactions through a bounded queue drained by a fixed worker pool"""
+        queue = asyncio.Queue(maxsize=64)
+        workers = [asyncio.create_task(self._worker(queue)) for _ in range(num_workers)]
+        
+        try:
+            for transaction in transactions:
+                await queue.put(transaction)
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    
     async def run_demo_scenario(self):
         """Run a comprehensive demo scenario"""
         print("🚀 Starting Fraud Detection Demo")
@@ -198,11 +284,8 @@ class TransactionGenerator:
         
         # Generate normal transactions
         print("📊 Generating normal transactions...")
-        for i in range(5):
-            account = random.choice(self.accounts)
-            transaction = self.generate_normal_transaction(account)
-            await self.send_transaction_for_analysis(transaction)
-            await asyncio.sleep(1)
+        normal_txs = self.generate_normal_batch(5)
+        await self.send_transactions(normal_txs)
         
         print("\n🚨 Generating fraud scenarios...")
         
@@ -217,9 +300,7 @@ class TransactionGenerator:
         print("\n🎯 Scenario 2: Rapid sequence of transactions")
         account = random.choice(self.accounts)
         rapid_txs = self.generate_fraud_scenario_2(account)
-        for tx in rapid_txs:
-            await self.send_transaction_for_analysis(tx)
-            await asyncio.sleep(0.5)
+        await self.send_transactions(rapid_txs)
         
         await asyncio.sleep(2)
         
@@ -232,9 +313,16 @@ class TransactionGenerator:
         print("\n✅ Demo scenario completed!")
         print("Check the fraud detection dashboard for results.")
 
+    async def close(self):
+        """Close the shared HTTP client"""
+        await self.client.aclose()
+
 async def main():
     generator = TransactionGenerator()
-    await generator.run_demo_scenario()
+    try:
+        await generator.run_demo_scenario()
+    finally:
+        await generator.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
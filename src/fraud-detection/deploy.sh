@@ -205,8 +205,8 @@ run_tests() {
         if [ -f "tests/test_fraud_detection.py" ]; then
             print_status "Running fraud detection tests..."
             cd tests
-            python -m pip install httpx pytest asyncio &> /dev/null
-            python test_fraud_detection.py
+            python -m pip install -r requirements.txt &> /dev/null
+            python -m pytest -n auto test_fraud_detection.py
             cd ..
         fi
     else
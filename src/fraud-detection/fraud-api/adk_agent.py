@@ -8,31 +8,262 @@ context management, and agent orchestration capabilities.
 """
 
 import asyncio
+import bisect
 import logging
-import json
-import inspect
-from typing import Dict, List, Optional, Any, Callable, Union
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Any, Callable, Union, NamedTuple, Literal, Awaitable
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 from enum import Enum
 
+import numpy as np
+import orjson
+import xxhash
+from numba import njit
 import google.generativeai as genai
+from pydantic import BaseModel, Field, field_validator
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
 logger = logging.getLogger(__name__)
 
+# Cap on concurrent outbound calls (provider fetches + Gemini) per agent
+MAX_OUTBOUND = int(os.getenv("ADK_MAX_OUTBOUND", "32"))
+
+# Speculative synthesis once this many tools have reported (0 disables it);
+# a speculative decision above the confidence bar short-circuits the rest
+PARTIAL_SYNTHESIS_TOOLS = int(os.getenv("ADK_PARTIAL_SYNTHESIS_TOOLS", "0"))
+PARTIAL_SYNTHESIS_CONFIDENCE = 0.9
+
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+}
+
+_PROMPT_TMPL = """
+You are an expert fraud detection AI agent using Google's Agent Developer Kit (ADK).
+Analyze the following transaction and tool execution results to make a final fraud determination.
+
+TRANSACTION:
+{transaction}
+
+TOOL EXECUTION RESULTS:
+{tool_results}
+
+CONTEXT DATA:
+{context}
+
+Based on this comprehensive analysis, provide a final fraud assessment in JSON format:
+{{
+    "fraud_score": 0.0-1.0,
+    "risk_level": "LOW|MEDIUM|HIGH|CRITICAL",
+    "confidence": 0.0-1.0,
+    "primary_risk_factors": ["factor1", "factor2"],
+    "explanation": "Clear reasoning based on tool analysis",
+    "recommendation": "APPROVE|REVIEW|BLOCK",
+    "tool_contributions": [{{"tool_name": "tool_name", "contribution": "contribution_description"}}]
+}}
+"""
+
+# Lookup tables for the categorize helpers and temporal hour risk
+_AMOUNT_CUTOFFS = (10.0, 100.0, 500.0, 2000.0)
+_AMOUNT_CATS = ("micro", "small", "medium", "large", "very_large")
+_HOUR_CATS = tuple(
+    "morning" if 6 <= h <= 9 else
+    "business_hours" if 10 <= h <= 16 else
+    "evening" if 17 <= h <= 21 else
+    "late_evening" if h >= 22 else
+    "night"
+    for h in range(24)
+)
+_HOUR_RISK = tuple(
+    ("suspicious_late_night_hour", 0.5) if 2 <= h <= 5 else
+    ("late_night_transaction", 0.3) if h >= 23 or h <= 1 else
+    ("early_morning_unusual", 0.2) if h <= 7 else
+    (None, 0.0)
+    for h in range(24)
+)
+_HOUR_RISK_SCORES = np.array([score for _, score in _HOUR_RISK])
+
+# Bit i of a flag mask returned by the JIT scorers selects label i
+_BEHAVIORAL_FACTORS = (
+    "extreme_amount_deviation",
+    "high_amount_deviation",
+    "moderate_amount_deviation",
+    "high_frequency_transactions",
+    "extreme_frequency_transactions",
+    "unusual_merchant_category",
+)
+_VELOCITY_FACTORS = (
+    "high_velocity_transactions",
+    "extreme_velocity_transactions",
+    "high_value_velocity_pattern",
+)
+
+def _decode_factors(flags: int, labels: tuple) -> List[str]:
+    """Expand a factor bitmask into its risk_factors labels"""
+    return [label for i, label in enumerate(labels) if flags >> i & 1]
+
+@njit(cache=True, fastmath=True)
+def _score_behavioral(amount, avg_amount, recent_count, knows_category):
+    """Behavioral deviation rules -> (risk_score, factor bitmask)"""
+    score = 0.0
+    flags = 0
+    if avg_amount > 0:
+        deviation_ratio = amount / avg_amount
+        if deviation_ratio > 10:
+            flags |= 1
+            score += 0.6
+        elif deviation_ratio > 5:
+            flags |= 2
+            score += 0.4
+        elif deviation_ratio > 3:
+            flags |= 4
+            score += 0.2
+    if recent_count > 10:
+        flags |= 8
+        score += 0.3
+    elif recent_count > 20:
+        flags |= 16
+        score += 0.5
+    if amount > 1000 and not knows_category:
+        flags |= 32
+        score += 0.2
+    return min(score, 1.0), np.uint16(flags)
+
+@njit(cache=True, fastmath=True)
+def _score_velocity(amount, recent_count):
+    """Velocity rules -> (risk_score, factor bitmask)"""
+    score = 0.0
+    flags = 0
+    if recent_count > 5:
+        flags |= 1
+        score += 0.4
+    if recent_count > 10:
+        flags |= 2
+        score += 0.6
+    if amount > 500 and recent_count > 3:
+        flags |= 4
+        score += 0.5
+    return min(score, 1.0), np.uint16(flags)
+
+class FraudDecision(BaseModel):
+    """Structured synthesis output returned by Gemini"""
+    fraud_score: float
+    risk_level: Literal["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+    confidence: float
+    primary_risk_factors: List[str]
+    explanation: str
+    recommendation: Literal["APPROVE", "REVIEW", "BLOCK"]
+    tool_contributions: Dict[str, str] = Field(default_factory=dict)
+    
+    @field_validator("tool_contributions", mode="before")
+    @classmethod
+    def _contributions_to_map(cls, value: Any) -> Any:
+        """Fold the schema's list of {tool_name, contribution} pairs into a map"""
+        if isinstance(value, list):
+            return {item["tool_name"]: item["contribution"] for item in value}
+        return value
+
+# Gemini's schema subset has no free-form maps, so tool_contributions is
+# requested as a list of {tool_name, contribution} pairs
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "object",
+        "properties": {
+            "fraud_score": {"type": "number"},
+            "risk_level": {"type": "string", "format": "enum", "enum": ["LOW", "MEDIUM", "HIGH", "CRITICAL"]},
+            "confidence": {"type": "number"},
+            "primary_risk_factors": {"type": "array", "items": {"type": "string"}},
+            "explanation": {"type": "string"},
+            "recommendation": {"type": "string", "format": "enum", "enum": ["APPROVE", "REVIEW", "BLOCK"]},
+            "tool_contributions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "tool_name": {"type": "string"},
+                        "contribution": {"type": "string"},
+                    },
+                    "required": ["tool_name", "contribution"],
+                },
+            },
+        },
+        "required": ["fraud_score", "risk_level", "confidence", "primary_risk_factors",
+                     "explanation", "recommendation", "tool_contributions"],
+    },
+}
+
+# A batched synthesis call answers N prompts with one array of decisions,
+# each tagged with the index of the prompt it answers
+_DECISION_SCHEMA = GENERATION_CONFIG["response_schema"]
+BATCH_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"index": {"type": "integer"}, **_DECISION_SCHEMA["properties"]},
+            "required": ["index", *_DECISION_SCHEMA["required"]],
+        },
+    },
+}
+
+_BATCH_PROMPT_HEADER = """
+You will receive {count} independent fraud analysis requests, each introduced by its index in the form [i].
+Answer every request on its own, without using information from the other requests.
+Return a JSON array with exactly one decision object per request, and set "index" in each object to the request's index.
+"""
+
+# One GenerativeModel per event loop and (model_name, safety_settings, generation_config)
+# so async clients are reused but never shared across loops. Keyed on the loop object
+# weakly, so a closed loop's models go with it and a new loop never inherits them.
+# Config dicts are keyed by identity and kept in the entry so their ids stay valid.
+_MODEL_CACHE: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, tuple]]" = weakref.WeakKeyDictionary()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def _get_model(model_name: str, safety_settings: Dict = SAFETY_SETTINGS,
+               generation_config: Dict = GENERATION_CONFIG) -> genai.GenerativeModel:
+    """Return the cached GenerativeModel for model_name and config on the running event loop"""
+    loop = asyncio.get_running_loop()
+    key = (model_name, id(safety_settings), id(generation_config))
+    entry = _MODEL_CACHE.get(loop, {}).get(key)
+    if entry is None:
+        with _MODEL_CACHE_LOCK:
+            models = _MODEL_CACHE.setdefault(loop, {})
+            entry = models.get(key)
+            if entry is None:
+                model = genai.GenerativeModel(
+                    model_name,
+                    safety_settings=safety_settings,
+                    generation_config=generation_config
+                )
+                entry = models[key] = (safety_settings, generation_config, model)
+    return entry[2]
+
 # ADK Core Components
 
-class ToolExecutionResult:
+class ToolExecutionResult(NamedTuple):
     """Result of tool execution with metadata"""
-    def __init__(self, success: bool, result: Any, error: Optional[str] = None, 
-                 execution_time_ms: float = 0.0, metadata: Optional[Dict] = None):
-        self.success = success
-        self.result = result
-        self.error = error
-        self.execution_time_ms = execution_time_ms
-        self.metadata = metadata or {}
+    success: bool
+    result: Any
+    error: Optional[str] = None
+    execution_time_ms: float = 0.0
+    tool_name: str = ""
+    execution_count: int = 0
+    error_type: Optional[str] = None
+    
+    @property
+    def metadata(self) -> tuple:
+        """(tool_name, execution_count, error_type)"""
+        return self[4:]
 
 class AgentTool:
     """ADK Tool with execution capabilities and metadata"""
@@ -42,40 +273,29 @@ class AgentTool:
         self.description = description
         self.func = func
         self.parameters = parameters or {}
+        self._is_async = asyncio.iscoroutinefunction(func)
         self.execution_count = 0
         self.total_execution_time = 0.0
         
     async def execute(self, context: Any, **kwargs) -> ToolExecutionResult:
         """Execute the tool with proper error handling and metrics"""
-        start_time = datetime.utcnow()
+        start_ns = time.perf_counter_ns()
         try:
-            if inspect.iscoroutinefunction(self.func):
+            if self._is_async:
                 result = await self.func(context, **kwargs)
             else:
                 result = self.func(context, **kwargs)
             
-            execution_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+            execution_time = (time.perf_counter_ns() - start_ns) / 1e6
             self.execution_count += 1
             self.total_execution_time += execution_time
             
-            return ToolExecutionResult(
-                success=True,
-                result=result,
-                execution_time_ms=execution_time,
-                metadata={
-                    "tool_name": self.name,
-                    "execution_count": self.execution_count
-                }
-            )
+            return ToolExecutionResult(True, result, None, execution_time, self.name, self.execution_count)
         except Exception as e:
-            execution_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+            execution_time = (time.perf_counter_ns() - start_ns) / 1e6
             logger.error(f"Tool {self.name} execution failed: {str(e)}")
             return ToolExecutionResult(
-                success=False,
-                result=None,
-                error=str(e),
-                execution_time_ms=execution_time,
-                metadata={"tool_name": self.name, "error_type": type(e).__name__}
+                False, None, str(e), execution_time, self.name, self.execution_count, type(e).__name__
             )
 
 def tool(name: str, description: str, parameters: Optional[Dict] = None):
@@ -85,44 +305,200 @@ def tool(name: str, description: str, parameters: Optional[Dict] = None):
         return func
     return decorator
 
+def _args_digest(args: tuple, kwargs: Dict) -> int:
+    """Order-insensitive 64-bit digest of call arguments for use in cache keys"""
+    key_bytes = orjson.dumps((args, kwargs), option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return xxhash.xxh3_64_intdigest(key_bytes)
+
+class TTLCache:
+    """Small LRU cache whose entries expire ttl seconds after insertion"""
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get(self, key: Any) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[1]
+    
+    def set(self, key: Any, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+def transaction_fingerprint(transaction: Dict) -> tuple:
+    """Identity of a transaction for deduplicating repeated analyses"""
+    return (
+        transaction.get("amount"),
+        transaction.get("timestamp"),
+        transaction.get("fromAccountNum"),
+        transaction.get("toAccountNum"),
+    )
+
+# Tool results shared across agents; tools are pure functions of the
+# transaction and its provider context, so retries and shadow scoring reuse them
+_TOOL_RESULT_CACHE = TTLCache(maxsize=10_000, ttl=30)
+
 class ContextProvider:
     """ADK Context Provider for enriching agent decisions"""
     def __init__(self, name: str, description: str, provider_func: Callable,
-                 cache_ttl: int = 300, priority: int = 1):
+                 cache_ttl: int = 300, priority: int = 1, cache_size: int = 10000):
         self.name = name
         self.description = description
         self.provider_func = provider_func
         self.cache_ttl = cache_ttl
         self.priority = priority
-        self._cache = {}
-        self._cache_timestamps = {}
+        self.cache_size = cache_size
+        self._is_async = asyncio.iscoroutinefunction(provider_func)
+        # cache_key -> (expires_at, future); in-flight fetches are stored too so
+        # concurrent misses for the same key share a single upstream call
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
     
     async def get_context(self, key: str, *args, **kwargs) -> Dict:
-        """Get context with caching support"""
-        cache_key = f"{key}:{hash(str(args) + str(kwargs))}"
+        """Get context with TTL-LRU caching and single-flight fetches"""
+        cache_key = (key, _args_digest(args, kwargs))
+        now = time.monotonic()
+        
+        entry = self._cache.get(cache_key)
+        if entry is not None and entry[0] > now:
+            self._cache.move_to_end(cache_key)
+            return await asyncio.shield(entry[1])
         
-        # Check cache
-        if (cache_key in self._cache and 
-            datetime.utcnow().timestamp() - self._cache_timestamps.get(cache_key, 0) < self.cache_ttl):
-            return self._cache[cache_key]
+        future = asyncio.get_running_loop().create_future()
+        self._cache[cache_key] = (now + self.cache_ttl, future)
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
         
-        # Fetch new context
         try:
-            if inspect.iscoroutinefunction(self.provider_func):
+            if self._is_async:
                 context = await self.provider_func(*args, **kwargs)
             else:
                 context = self.provider_func(*args, **kwargs)
+        except asyncio.CancelledError:
+            self._evict(cache_key, future)
+            future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Context provider {self.name} failed: {str(e)}")
+            context = {"error": str(e), "provider": self.name}
+            # Don't keep failures around; waiters still get the error payload
+            self._evict(cache_key, future)
+        
+        future.set_result(context)
+        return context
+    
+    def _evict(self, cache_key: tuple, future: asyncio.Future):
+        """Drop cache_key only if it still points at this fetch"""
+        entry = self._cache.get(cache_key)
+        if entry is not None and entry[1] is future:
+            del self._cache[cache_key]
+
+class GeminiBatcher:
+    """Coalesces concurrent Gemini prompts and answers each window with one multi-prompt call"""
+    def __init__(self, model_name: str, max_size: int = 8, wait_ms: float = 50.0,
+                 semaphore: Optional[asyncio.Semaphore] = None):
+        self.model_name = model_name
+        self.semaphore = semaphore or asyncio.Semaphore(MAX_OUTBOUND)
+        self.max_size = max_size
+        self.wait_ms = wait_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Dispatches run concurrently (bounded by the semaphore); hold references until done
+        self._inflight: set = set()
+    
+    async def submit(self, prompt: str) -> str:
+        """Queue a prompt and wait for its response text"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, future))
+        return await future
+    
+    async def _run(self):
+        """Drain up to max_size prompts within the wait window, then dispatch them together"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.wait_ms / 1000.0
+            
+            while len(batch) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
             
-            # Cache result
-            self._cache[cache_key] = context
-            self._cache_timestamps[cache_key] = datetime.utcnow().timestamp()
+            dispatch = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(dispatch)
+            dispatch.add_done_callback(self._inflight.discard)
+    
+    async def _dispatch(self, batch: List):
+        """Send one request for the whole batch and resolve each prompt's future with its decision"""
+        model = _get_model(self.model_name)
+        try:
+            async with self.semaphore:
+                if len(batch) == 1:
+                    response = await model.generate_content_async(batch[0][0])
+                    answers = {0: response.text}
+                else:
+                    response = await model.generate_content_async(
+                        self._build_prompt(batch), generation_config=BATCH_GENERATION_CONFIG
+                    )
+                    answers = self._split_response(response.text, len(batch))
             
-            return context
+            for index, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if index in answers:
+                    future.set_result(answers[index])
+                else:
+                    future.set_exception(ValueError(f"No decision returned for batch index {index}"))
         except Exception as e:
-            logger.error(f"Context provider {self.name} failed: {str(e)}")
-            return {"error": str(e), "provider": self.name}
-
-@dataclass
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+    
+    def _build_prompt(self, batch: List) -> str:
+        """Build a single prompt listing every request with its batch index"""
+        requests = "\n".join(f"[{index}]\n{prompt}" for index, (prompt, _) in enumerate(batch))
+        return _BATCH_PROMPT_HEADER.format(count=len(batch)) + requests
+    
+    def _split_response(self, response_text: str, batch_size: int) -> Dict[int, str]:
+        """Map batch indexes to the JSON text of each decision in the array response"""
+        answers = {}
+        for item in orjson.loads(response_text):
+            index = item.pop("index", None)
+            if isinstance(index, int) and 0 <= index < batch_size:
+                answers[index] = orjson.dumps(item).decode()
+        return answers
+
+@dataclass(slots=True)
+class TransactionBatch:
+    """Column-oriented (SoA) view of many transactions for vectorized scoring"""
+    amount: np.ndarray          # USD, float
+    hour: np.ndarray            # 0-23, int8
+    is_weekend: np.ndarray      # bool
+    user_avg: np.ndarray        # user's average amount in USD, float
+    recent_count: np.ndarray    # recent transaction count, int16
+    unusual_hour: np.ndarray    # hour outside the user's typical hours, bool
+    knows_category: np.ndarray  # "electronics" among frequent merchants, bool
+
+@dataclass(slots=True)
 class AgentContext:
     """Rich context for agent decision making with ADK patterns"""
     transaction: Dict
@@ -133,29 +509,41 @@ class AgentContext:
     tool_results: Dict[str, ToolExecutionResult] = field(default_factory=dict)
     execution_metadata: Dict = field(default_factory=dict)
     timestamp: datetime = field(default_factory=datetime.utcnow)
+    start_ns: int = field(default_factory=time.perf_counter_ns)
+    context_futures: Dict[str, asyncio.Future] = field(default_factory=dict)
 
 class ADKAgent(ABC):
     """
     Google Agent Developer Kit (ADK) Base Agent
     Implements proper ADK patterns with tool orchestration and context management
     """
+    _tool_registry: tuple = ()
     
     def __init__(self, name: str, model_name: str = "gemini-1.5-flash"):
         self.name = name
-        self.model = genai.GenerativeModel(
-            model_name,
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            }
-        )
+        self.model_name = model_name
+        
+        # Shared by provider fetches and Gemini calls so bursts queue here
+        # instead of piling up in the HTTP/gRPC clients
+        self._outbound_sem = asyncio.Semaphore(MAX_OUTBOUND)
+        
+        # Coalesces concurrent synthesize_decision prompts into one Gemini
+        # call; the batcher resolves the model on the loop it dispatches from
+        self.batcher = GeminiBatcher(model_name, semaphore=self._outbound_sem)
         
         # ADK Core Components
         self.tools: Dict[str, AgentTool] = {}
         self.context_providers: Dict[str, ContextProvider] = {}
-        self.execution_history: List[Dict] = []
+        self.execution_history: deque = deque(maxlen=1000)
+        
+        # Optional async sink for persisting history off the request path;
+        # records are drained in batches by a background flusher
+        self.history_sink: Optional[Callable[[List[Dict]], Awaitable[None]]] = None
+        self.history_flush_batch = 500
+        self.history_flush_interval = 5.0
+        self._pending_history: deque = deque(maxlen=10_000)
+        self._history_flusher_task: Optional[asyncio.Task] = None
+        self._history_stop: Optional[asyncio.Event] = None
         
         # Discover and register tools
         self._discover_tools()
@@ -163,14 +551,62 @@ class ADKAgent(ABC):
         
         logger.info(f"ADK Agent '{name}' initialized with {len(self.tools)} tools and {len(self.context_providers)} context providers")
     
+    def start_history_flusher(self, sink: Callable[[List[Dict]], Awaitable[None]]):
+        """Persist execution records through sink from a background task on the running loop"""
+        self.history_sink = sink
+        self._history_stop = asyncio.Event()
+        self._history_flusher_task = asyncio.create_task(self._history_flusher())
+    
+    async def stop_history_flusher(self):
+        """Stop the flusher after it has written everything still pending"""
+        if self._history_flusher_task is None:
+            return
+        self._history_stop.set()
+        await self._history_flusher_task
+        self._history_flusher_task = None
+        self.history_sink = None
+    
+    async def _flush_history(self):
+        """Drain pending records into history_sink in batches of history_flush_batch"""
+        while self._pending_history:
+            batch = [
+                self._pending_history.popleft()
+                for _ in range(min(self.history_flush_batch, len(self._pending_history)))
+            ]
+            try:
+                await self.history_sink(batch)
+            except Exception as e:
+                logger.error(f"Execution history flush failed for {len(batch)} records: {str(e)}")
+    
+    async def _history_flusher(self):
+        """Flush pending history every history_flush_interval seconds until stopped"""
+        while True:
+            try:
+                await asyncio.wait_for(self._history_stop.wait(), self.history_flush_interval)
+            except asyncio.TimeoutError:
+                await self._flush_history()
+                continue
+            await self._flush_history()
+            return
+    
+    def __init_subclass__(cls, **kwargs):
+        """Snapshot @tool-decorated methods into a per-class registry"""
+        super().__init_subclass__(**kwargs)
+        registry = {}
+        for klass in reversed(cls.__mro__):
+            for attr_name, attr in vars(klass).items():
+                spec = getattr(attr, '_adk_tool', None)
+                if spec is not None:
+                    registry[attr_name] = spec
+        cls._tool_registry = tuple(registry.items())
+    
     def _discover_tools(self):
-        """Discover all tools decorated with @tool"""
-        for attr_name in dir(self):
-            attr = getattr(self, attr_name)
-            if hasattr(attr, '_adk_tool'):
-                tool_obj = attr._adk_tool
-                self.tools[tool_obj.name] = tool_obj
-                logger.debug(f"Registered tool: {tool_obj.name}")
+        """Register this instance's tools from the class-level @tool registry"""
+        self.tools = {
+            spec.name: AgentTool(spec.name, spec.description, getattr(self, attr_name), spec.parameters)
+            for attr_name, spec in self._tool_registry
+        }
+        logger.debug(f"Registered tools: {list(self.tools)}")
     
     def _register_context_providers(self):
         """Register context providers - to be implemented by subclasses"""
@@ -179,21 +615,45 @@ class ADKAgent(ABC):
     async def execute_tool(self, tool_name: str, context: AgentContext, **kwargs) -> ToolExecutionResult:
         """Execute a specific tool with proper ADK patterns"""
         if tool_name not in self.tools:
-            return ToolExecutionResult(
-                success=False,
-                result=None,
-                error=f"Tool '{tool_name}' not found",
-                metadata={"available_tools": list(self.tools.keys())}
-            )
+            return ToolExecutionResult(False, None, f"Tool '{tool_name}' not found", 0.0, tool_name)
         
-        tool = self.tools[tool_name]
-        result = await tool.execute(context, **kwargs)
+        cache_key = None if kwargs else (tool_name, transaction_fingerprint(context.transaction))
+        result = _TOOL_RESULT_CACHE.get(cache_key) if cache_key else None
+        if result is None:
+            result = await self.tools[tool_name].execute(context, **kwargs)
+            if cache_key and result.success:
+                _TOOL_RESULT_CACHE.set(cache_key, result)
         
         # Store result in context for other tools to use
         context.tool_results[tool_name] = result
         
         return result
     
+    def start_context_gathering(self, context: AgentContext):
+        """Start fetching all provider contexts in the background without waiting for them"""
+        key = f"transaction_{context.transaction.get('transactionId', 'unknown')}"
+        for provider in self.context_providers.values():
+            if provider.name not in context.context_futures:
+                context.context_futures[provider.name] = asyncio.ensure_future(
+                    self._bounded(provider.get_context(key, context.transaction))
+                )
+    
+    async def _bounded(self, coro):
+        """Run an outbound call under the shared concurrency limit"""
+        async with self._outbound_sem:
+            return await coro
+    
+    async def get_provider_context(self, context: AgentContext, provider_name: str) -> Dict:
+        """Wait for a single provider's context so tools only block on what they read"""
+        future = context.context_futures.get(provider_name)
+        if future is None:
+            return context.external_context.get(provider_name, {})
+        try:
+            return await future
+        except Exception as e:
+            logger.error(f"Context provider {provider_name} failed: {str(e)}")
+            return {"error": str(e)}
+    
     async def gather_context(self, base_context: AgentContext) -> AgentContext:
         """Gather enriched context from all providers"""
         # Sort providers by priority
@@ -203,45 +663,43 @@ class ADKAgent(ABC):
             reverse=True
         )
         
-        for provider in sorted_providers:
-            try:
-                context_data = await provider.get_context(
-                    f"transaction_{base_context.transaction.get('transactionId', 'unknown')}",
-                    base_context.transaction
-                )
+        # Dispatch all providers concurrently (reusing any already started); merge results in priority order
+        self.start_context_gathering(base_context)
+        results = await asyncio.gather(
+            *(base_context.context_futures[provider.name] for provider in sorted_providers),
+            return_exceptions=True
+        )
+        
+        for provider, context_data in zip(sorted_providers, results):
+            if isinstance(context_data, Exception):
+                logger.error(f"Context provider {provider.name} failed: {str(context_data)}")
+                base_context.external_context[provider.name] = {"error": str(context_data)}
+            else:
                 base_context.external_context[provider.name] = context_data
                 logger.debug(f"Context provider {provider.name} provided data")
-            except Exception as e:
-                logger.error(f"Context provider {provider.name} failed: {str(e)}")
-                base_context.external_context[provider.name] = {"error": str(e)}
         
         return base_context
     
-    async def execute_tool_pipeline(self, context: AgentContext, tool_names: List[str]) -> Dict[str, ToolExecutionResult]:
-        """Execute multiple tools in parallel or sequence"""
+    async def execute_tool_pipeline(self, context: AgentContext, tool_names: List[str],
+                                    on_result: Optional[Callable[[int], None]] = None) -> Dict[str, ToolExecutionResult]:
+        """Execute tools in parallel, recording each result as soon as it arrives"""
         results = {}
         
-        # Execute tools in parallel for better performance
-        tasks = []
-        for tool_name in tool_names:
-            if tool_name in self.tools:
-                task = asyncio.create_task(self.execute_tool(tool_name, context))
-                tasks.append((tool_name, task))
-        
-        # Gather results
-        for tool_name, task in tasks:
+        async def run(tool_name: str) -> ToolExecutionResult:
             try:
-                result = await task
-                results[tool_name] = result
-                logger.debug(f"Tool {tool_name} completed: success={result.success}")
+                return await self.execute_tool(tool_name, context)
             except Exception as e:
                 logger.error(f"Tool {tool_name} failed with exception: {str(e)}")
-                results[tool_name] = ToolExecutionResult(
-                    success=False,
-                    result=None,
-                    error=str(e),
-                    metadata={"tool_name": tool_name}
-                )
+                return ToolExecutionResult(False, None, str(e), 0.0, tool_name, 0, type(e).__name__)
+        
+        names = [tool_name for tool_name in tool_names if tool_name in self.tools]
+        for next_result in asyncio.as_completed([run(tool_name) for tool_name in names]):
+            result = await next_result
+            logger.debug(f"Tool {result.tool_name} completed: success={result.success}")
+            results[result.tool_name] = result
+            context.tool_results[result.tool_name] = result
+            if on_result is not None:
+                on_result(len(results))
         
         return results
     
@@ -255,34 +713,15 @@ class ADKAgent(ABC):
             else:
                 tool_results_summary[tool_name] = {"error": result.error}
         
-        prompt = f"""
-You are an expert fraud detection AI agent using Google's Agent Developer Kit (ADK).
-Analyze the following transaction and tool execution results to make a final fraud determination.
-
-TRANSACTION:
-{json.dumps(context.transaction, indent=2)}
-
-TOOL EXECUTION RESULTS:
-{json.dumps(tool_results_summary, indent=2)}
-
-CONTEXT DATA:
-{json.dumps(context.external_context, indent=2)}
-
-Based on this comprehensive analysis, provide a final fraud assessment in JSON format:
-{{
-    "fraud_score": 0.0-1.0,
-    "risk_level": "LOW|MEDIUM|HIGH|CRITICAL",
-    "confidence": 0.0-1.0,
-    "primary_risk_factors": ["factor1", "factor2"],
-    "explanation": "Clear reasoning based on tool analysis",
-    "recommendation": "APPROVE|REVIEW|BLOCK",
-    "tool_contributions": {{"tool_name": "contribution_description"}}
-}}
-"""
+        prompt = _PROMPT_TMPL.format_map({
+            "transaction": orjson.dumps(context.transaction).decode(),
+            "tool_results": orjson.dumps(tool_results_summary).decode(),
+            "context": orjson.dumps(context.external_context).decode(),
+        })
         
         try:
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
-            decision = self._parse_ai_response(response.text)
+            response_text = await self.batcher.submit(prompt)
+            decision = FraudDecision.model_validate_json(response_text).model_dump()
             
             # Add ADK metadata
             decision["adk_metadata"] = {
@@ -291,7 +730,7 @@ Based on this comprehensive analysis, provide a final fraud assessment in JSON f
                 "successful_tools": [name for name, result in context.tool_results.items() if result.success],
                 "failed_tools": [name for name, result in context.tool_results.items() if not result.success],
                 "context_providers": list(self.context_providers.keys()),
-                "processing_time_ms": (datetime.utcnow() - context.timestamp).total_seconds() * 1000,
+                "processing_time_ms": (time.perf_counter_ns() - context.start_ns) / 1e6,
                 "execution_id": f"{self.name}_{context.timestamp.isoformat()}"
             }
             
@@ -301,29 +740,6 @@ Based on this comprehensive analysis, provide a final fraud assessment in JSON f
             logger.error(f"AI decision synthesis failed: {str(e)}")
             return self._create_fallback_decision(context)
     
-    def _parse_ai_response(self, response_text: str) -> Dict:
-        """Parse AI response with robust error handling"""
-        try:
-            # Extract JSON from response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                return json.loads(json_str)
-            else:
-                raise ValueError("No JSON found in response")
-        except Exception as e:
-            logger.error(f"Failed to parse AI response: {str(e)}")
-            return {
-                "fraud_score": 0.5,
-                "risk_level": "MEDIUM",
-                "confidence": 0.3,
-                "primary_risk_factors": ["ai_parsing_error"],
-                "explanation": f"Unable to parse AI response: {str(e)}",
-                "recommendation": "REVIEW",
-                "tool_contributions": {}
-            }
-    
     def _create_fallback_decision(self, context: AgentContext) -> Dict:
         """Create fallback decision when AI synthesis fails"""
         # Calculate simple average from successful tool results
@@ -416,10 +832,10 @@ class FraudDetectionAgent(ADKAgent):
         # Step 1: Create agent context
         context = AgentContext(transaction=input_data)
 
-        # Step 2: Gather enriched context from providers
-        context = await self.gather_context(context)
+        # Step 2: Start gathering enriched context from providers in the background
+        self.start_context_gathering(context)
 
-        # Step 3: Execute tool pipeline
+        # Step 3: Execute tool pipeline; each tool awaits only the providers it reads
         tool_names = [
             "transaction_amount_analysis",
             "temporal_pattern_analysis",
@@ -429,10 +845,20 @@ class FraudDetectionAgent(ADKAgent):
             "merchant_risk_analysis"
         ]
 
-        tool_results = await self.execute_tool_pipeline(context, tool_names)
+        partial_ready = asyncio.Event()
+        
+        def on_result(completed: int):
+            if PARTIAL_SYNTHESIS_TOOLS and completed >= PARTIAL_SYNTHESIS_TOOLS:
+                partial_ready.set()
+        
+        pipeline = asyncio.gather(
+            self.execute_tool_pipeline(context, tool_names, on_result),
+            self.gather_context(context)
+        )
 
-        # Step 4: Synthesize final decision using AI
-        final_decision = await self.synthesize_decision(context)
+        # Step 4: Synthesize final decision using AI, speculatively on partial
+        # tool results when enabled
+        final_decision = await self._synthesize_streaming(context, pipeline, partial_ready)
 
         # Step 5: Record execution for learning
         self._record_execution(context, final_decision)
@@ -440,6 +866,46 @@ class FraudDetectionAgent(ADKAgent):
         logger.info(f"ADK Agent completed analysis - Risk Score: {final_decision.get('fraud_score', 0):.2f}")
         return final_decision
 
+    async def analyze_transaction(self, transaction: Dict, user_history: Optional[List[Dict]] = None) -> Dict:
+        """Run the ADK pipeline and return the flat result shape used by the API service"""
+        decision = await self.process(transaction)
+        fraud_score = float(decision.get("fraud_score", 0.1))
+        return {
+            "transaction_id": str(transaction.get("transactionId")),
+            "fraud_score": fraud_score,
+            "is_fraud": fraud_score > 0.7,
+            "risk_level": decision.get("risk_level", "LOW"),
+            "confidence": float(decision.get("confidence", 0.5)),
+            "explanation": decision.get("explanation", "ADK analysis completed"),
+            "risk_factors": decision.get("primary_risk_factors", []),
+            "recommendation": decision.get("recommendation", "APPROVE")
+        }
+
+    async def _synthesize_streaming(self, context: AgentContext, pipeline: asyncio.Future,
+                                    partial_ready: asyncio.Event) -> Dict:
+        """Synthesize once the pipeline finishes, or earlier from a confident partial decision"""
+        if PARTIAL_SYNTHESIS_TOOLS:
+            ready = asyncio.ensure_future(partial_ready.wait())
+            await asyncio.wait({pipeline, ready}, return_when=asyncio.FIRST_COMPLETED)
+            ready.cancel()
+            
+            if not pipeline.done():
+                partial = asyncio.ensure_future(self.synthesize_decision(context))
+                await asyncio.wait({pipeline, partial}, return_when=asyncio.FIRST_COMPLETED)
+                
+                if partial.done() and not pipeline.done():
+                    decision = partial.result()
+                    if (decision.get("confidence", 0) > PARTIAL_SYNTHESIS_CONFIDENCE
+                            and not decision.get("adk_metadata", {}).get("fallback_mode")):
+                        pipeline.cancel()
+                        pipeline.add_done_callback(lambda f: f.cancelled() or f.exception())
+                        decision["adk_metadata"]["partial_synthesis"] = True
+                        return decision
+                partial.cancel()
+        
+        await pipeline
+        return await self.synthesize_decision(context)
+
     # ADK Tools Implementation
 
     @tool("transaction_amount_analysis", "Analyze transaction amount for suspicious patterns")
@@ -451,7 +917,8 @@ class FraudDetectionAgent(ADKAgent):
         risk_score = 0.0
 
         # High amount analysis with context
-        user_avg = context.external_context.get("user_behavior", {}).get("average_transaction_amount", 100.0)
+        user_behavior = await self.get_provider_context(context, "user_behavior")
+        user_avg = user_behavior.get("average_transaction_amount", 100.0)
 
         if amount > 2000:
             risk_factors.append("high_value_transaction")
@@ -500,19 +967,9 @@ class FraudDetectionAgent(ADKAgent):
             timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
             hour = timestamp.hour
 
-            risk_factors = []
-            risk_score = 0.0
-
             # Suspicious hours analysis
-            if 2 <= hour <= 5:
-                risk_factors.append("suspicious_late_night_hour")
-                risk_score += 0.5
-            elif 23 <= hour or hour <= 1:
-                risk_factors.append("late_night_transaction")
-                risk_score += 0.3
-            elif 5 <= hour <= 7:
-                risk_factors.append("early_morning_unusual")
-                risk_score += 0.2
+            hour_factor, risk_score = _HOUR_RISK[hour]
+            risk_factors = [hour_factor] if hour_factor else []
 
             # Weekend analysis
             if timestamp.weekday() >= 5:  # Weekend
@@ -521,7 +978,7 @@ class FraudDetectionAgent(ADKAgent):
                     risk_score += 0.2
 
             # Frequency analysis from context
-            user_behavior = context.external_context.get("user_behavior", {})
+            user_behavior = await self.get_provider_context(context, "user_behavior")
             typical_hours = user_behavior.get("typical_transaction_hours", [])
             if typical_hours and hour not in typical_hours:
                 risk_factors.append("unusual_hour_for_user")
@@ -552,47 +1009,22 @@ class FraudDetectionAgent(ADKAgent):
     @tool("behavioral_deviation_analysis", "Analyze deviation from user's normal behavior")
     async def analyze_behavioral_deviation(self, context: AgentContext) -> Dict:
         """ADK Tool: Advanced behavioral deviation analysis"""
-        user_behavior = context.external_context.get("user_behavior", {})
+        user_behavior = await self.get_provider_context(context, "user_behavior")
         current_amount = context.transaction.get("amount", 0) / 100.0
-
-        risk_factors = []
-        risk_score = 0.0
-
-        # Amount deviation analysis
         avg_amount = user_behavior.get("average_transaction_amount", 100.0)
-        if avg_amount > 0:
-            deviation_ratio = current_amount / avg_amount
-
-            if deviation_ratio > 10:
-                risk_factors.append("extreme_amount_deviation")
-                risk_score += 0.6
-            elif deviation_ratio > 5:
-                risk_factors.append("high_amount_deviation")
-                risk_score += 0.4
-            elif deviation_ratio > 3:
-                risk_factors.append("moderate_amount_deviation")
-                risk_score += 0.2
-
-        # Frequency analysis
         recent_count = user_behavior.get("recent_transaction_count", 0)
-        if recent_count > 10:
-            risk_factors.append("high_frequency_transactions")
-            risk_score += 0.3
-        elif recent_count > 20:
-            risk_factors.append("extreme_frequency_transactions")
-            risk_score += 0.5
-
-        # Merchant category analysis
         frequent_merchants = user_behavior.get("frequent_merchants", [])
-        # Simulate merchant category detection
-        if current_amount > 1000 and "electronics" not in frequent_merchants:
-            risk_factors.append("unusual_merchant_category")
-            risk_score += 0.2
+
+        # Amount deviation, frequency and (simulated) merchant category rules
+        risk_score, flags = _score_behavioral(
+            float(current_amount), float(avg_amount), int(recent_count),
+            "electronics" in frequent_merchants
+        )
 
         return {
             "tool_name": "behavioral_deviation_analysis",
-            "risk_score": min(risk_score, 1.0),
-            "risk_factors": risk_factors,
+            "risk_score": float(risk_score),
+            "risk_factors": _decode_factors(int(flags), _BEHAVIORAL_FACTORS),
             "analysis_details": {
                 "deviation_ratio": current_amount / max(avg_amount, 1),
                 "recent_frequency": recent_count,
@@ -604,7 +1036,7 @@ class FraudDetectionAgent(ADKAgent):
     @tool("geospatial_risk_assessment", "Assess geographic and velocity-based risks")
     async def analyze_geospatial_risk(self, context: AgentContext) -> Dict:
         """ADK Tool: Advanced geospatial risk analysis"""
-        geo_context = context.external_context.get("geolocation_risk", {})
+        geo_context = await self.get_provider_context(context, "geolocation_risk")
 
         risk_factors = []
         risk_score = 0.0
@@ -650,31 +1082,17 @@ class FraudDetectionAgent(ADKAgent):
     @tool("velocity_fraud_detection", "Detect rapid transaction patterns")
     async def analyze_velocity_fraud(self, context: AgentContext) -> Dict:
         """ADK Tool: Velocity-based fraud detection"""
-        user_behavior = context.external_context.get("user_behavior", {})
-
-        risk_factors = []
-        risk_score = 0.0
-
-        # Recent transaction frequency
+        user_behavior = await self.get_provider_context(context, "user_behavior")
         recent_count = user_behavior.get("recent_transaction_count", 0)
-        if recent_count > 5:
-            risk_factors.append("high_velocity_transactions")
-            risk_score += 0.4
-
-        if recent_count > 10:
-            risk_factors.append("extreme_velocity_transactions")
-            risk_score += 0.6
-
-        # Time-based velocity (simulated)
         current_amount = context.transaction.get("amount", 0) / 100.0
-        if current_amount > 500 and recent_count > 3:
-            risk_factors.append("high_value_velocity_pattern")
-            risk_score += 0.5
+
+        # Recent frequency and (simulated) time-based velocity rules
+        risk_score, flags = _score_velocity(float(current_amount), int(recent_count))
 
         return {
             "tool_name": "velocity_fraud_detection",
-            "risk_score": min(risk_score, 1.0),
-            "risk_factors": risk_factors,
+            "risk_score": float(risk_score),
+            "risk_factors": _decode_factors(int(flags), _VELOCITY_FACTORS),
             "analysis_details": {
                 "recent_transaction_count": recent_count,
                 "velocity_category": "high" if recent_count > 5 else "normal"
@@ -684,7 +1102,7 @@ class FraudDetectionAgent(ADKAgent):
     @tool("merchant_risk_analysis", "Analyze merchant-related fraud risks")
     async def analyze_merchant_risk(self, context: AgentContext) -> Dict:
         """ADK Tool: Merchant risk analysis"""
-        merchant_context = context.external_context.get("merchant_intelligence", {})
+        merchant_context = await self.get_provider_context(context, "merchant_intelligence")
 
         risk_factors = []
         risk_score = 0.0
@@ -715,6 +1133,57 @@ class FraudDetectionAgent(ADKAgent):
             }
         }
 
+    # Batch scoring
+
+    @staticmethod
+    def score_batch(batch: TransactionBatch) -> Dict[str, np.ndarray]:
+        """Score many transactions at once with the rule-based tools as NumPy masks.
+        
+        Mirrors analyze_transaction_amount, analyze_temporal_patterns,
+        analyze_behavioral_deviation and analyze_velocity_fraud for offline
+        replay/backfill; the per-request agent path is unchanged.
+        """
+        amount = np.asarray(batch.amount, dtype=np.float64)
+        hour = np.asarray(batch.hour, dtype=np.intp)
+        user_avg = np.asarray(batch.user_avg, dtype=np.float64)
+        recent = np.asarray(batch.recent_count)
+        has_avg = user_avg > 0
+        
+        amount_score = (
+            np.where(amount > 2000, 0.4, 0.0)
+            + np.where(amount > 5000, 0.3, 0.0)
+            + np.where(has_avg & (amount > user_avg * 10), 0.5,
+                       np.where(has_avg & (amount > user_avg * 5), 0.3, 0.0))
+            + np.where((amount % 100 == 0) & (amount >= 1000), 0.2, 0.0)
+            + np.where(amount < 1.0, 0.15, 0.0)
+        )
+        
+        temporal_score = (
+            _HOUR_RISK_SCORES[hour]
+            + np.where(batch.is_weekend & (hour >= 2) & (hour <= 6), 0.2, 0.0)
+            + np.where(batch.unusual_hour, 0.3, 0.0)
+        )
+        
+        ratio = np.divide(amount, user_avg, out=np.zeros_like(amount), where=has_avg)
+        behavioral_score = (
+            np.select([ratio > 10, ratio > 5, ratio > 3], [0.6, 0.4, 0.2], 0.0)
+            + np.where(recent > 10, 0.3, 0.0)
+            + np.where((amount > 1000) & ~np.asarray(batch.knows_category), 0.2, 0.0)
+        )
+        
+        velocity_score = (
+            np.where(recent > 5, 0.4, 0.0)
+            + np.where(recent > 10, 0.6, 0.0)
+            + np.where((amount > 500) & (recent > 3), 0.5, 0.0)
+        )
+        
+        return {
+            "transaction_amount_analysis": np.clip(amount_score, 0.0, 1.0),
+            "temporal_pattern_analysis": np.clip(temporal_score, 0.0, 1.0),
+            "behavioral_deviation_analysis": np.clip(behavioral_score, 0.0, 1.0),
+            "velocity_fraud_detection": np.clip(velocity_score, 0.0, 1.0),
+        }
+
     # Context Providers Implementation
 
     async def _get_user_behavior_context(self, transaction: Dict) -> Dict:
@@ -767,29 +1236,11 @@ class FraudDetectionAgent(ADKAgent):
 
     def _categorize_amount(self, amount: float) -> str:
         """Categorize transaction amount"""
-        if amount < 10:
-            return "micro"
-        elif amount < 100:
-            return "small"
-        elif amount < 500:
-            return "medium"
-        elif amount < 2000:
-            return "large"
-        else:
-            return "very_large"
+        return _AMOUNT_CATS[bisect.bisect_right(_AMOUNT_CUTOFFS, amount)]
 
     def _categorize_time(self, hour: int) -> str:
         """Categorize transaction time"""
-        if 6 <= hour <= 9:
-            return "morning"
-        elif 10 <= hour <= 16:
-            return "business_hours"
-        elif 17 <= hour <= 21:
-            return "evening"
-        elif 22 <= hour <= 23:
-            return "late_evening"
-        else:
-            return "night"
+        return _HOUR_CATS[hour]
 
     def _record_execution(self, context: AgentContext, decision: Dict):
         """Record execution for learning and analytics"""
@@ -798,11 +1249,10 @@ class FraudDetectionAgent(ADKAgent):
             "transaction_id": context.transaction.get("transactionId"),
             "tools_executed": list(context.tool_results.keys()),
             "decision": decision,
-            "execution_time_ms": (datetime.utcnow() - context.timestamp).total_seconds() * 1000
+            "execution_time_ms": (time.perf_counter_ns() - context.start_ns) / 1e6
         }
 
+        # Bounded ring buffer; oldest records fall off automatically
         self.execution_history.append(execution_record)
-
-        # Keep only last 1000 executions
-        if len(self.execution_history) > 1000:
-            self.execution_history = self.execution_history[-1000:]
+        if self.history_sink is not None:
+            self._pending_history.append(execution_record)
@@ -0,0 +1,26 @@
+"""Partial index on transactions.is_fraud for the /stats fraud count
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_is_fraud", "transactions", ["is_fraud"],
+        postgresql_where=sa.text("is_fraud IS true"), if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_is_fraud", table_name="transactions", if_exists=True)
@@ -0,0 +1,26 @@
+"""Index fraud_alerts on (created_at DESC, id DESC) for /alerts and the 24h count
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_fraud_alerts_created_at_desc", "fraud_alerts",
+        [sa.text("created_at DESC"), sa.text("id DESC")], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_fraud_alerts_created_at_desc", table_name="fraud_alerts", if_exists=True)
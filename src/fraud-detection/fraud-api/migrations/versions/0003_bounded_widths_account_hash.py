@@ -0,0 +1,47 @@
+"""Bound transaction id/account widths and hash-index the account columns
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # int64 transaction ids and 10-digit Bank of Anthos account numbers
+    op.alter_column("transactions", "transaction_id", type_=sa.String(20), existing_type=sa.String())
+    op.alter_column("transactions", "from_account", type_=sa.String(10), existing_type=sa.String())
+    op.alter_column("transactions", "to_account", type_=sa.String(10), existing_type=sa.String())
+    op.alter_column("fraud_alerts", "transaction_id", type_=sa.String(20), existing_type=sa.String())
+    
+    # Account lookups are equality-only; hash indexes replace the default btrees
+    op.drop_index("ix_transactions_from_account", table_name="transactions", if_exists=True)
+    op.drop_index("ix_transactions_to_account", table_name="transactions", if_exists=True)
+    op.create_index(
+        "ix_transactions_from_account_hash", "transactions", ["from_account"],
+        postgresql_using="hash", if_not_exists=True,
+    )
+    op.create_index(
+        "ix_transactions_to_account_hash", "transactions", ["to_account"],
+        postgresql_using="hash", if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_to_account_hash", table_name="transactions", if_exists=True)
+    op.drop_index("ix_transactions_from_account_hash", table_name="transactions", if_exists=True)
+    op.create_index("ix_transactions_to_account", "transactions", ["to_account"], if_not_exists=True)
+    op.create_index("ix_transactions_from_account", "transactions", ["from_account"], if_not_exists=True)
+    
+    op.alter_column("fraud_alerts", "transaction_id", type_=sa.String(), existing_type=sa.String(20))
+    op.alter_column("transactions", "to_account", type_=sa.String(), existing_type=sa.String(10))
+    op.alter_column("transactions", "from_account", type_=sa.String(), existing_type=sa.String(10))
+    op.alter_column("transactions", "transaction_id", type_=sa.String(), existing_type=sa.String(20))
@@ -0,0 +1,34 @@
+"""Add the agent_executions table for persisted ADK execution history
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15
+"""
+
+from alembic import op
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The API's create_all may already have created it on startup
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS agent_executions ("
+        "id SERIAL PRIMARY KEY, "
+        "transaction_id VARCHAR(20), "
+        "executed_at TIMESTAMP WITHOUT TIME ZONE, "
+        "execution_time_ms FLOAT, "
+        "record TEXT)"
+    )
+    op.create_index("ix_agent_executions_id", "agent_executions", ["id"], if_not_exists=True)
+    op.create_index(
+        "ix_agent_executions_transaction_id", "agent_executions", ["transaction_id"], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS agent_executions")
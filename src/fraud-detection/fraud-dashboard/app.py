@@ -10,8 +10,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import requests
-import time
+import httpx
 from datetime import datetime, timedelta
 import json
 
@@ -52,10 +51,16 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_api_client():
+    """One pooled HTTP/2 client per server process, reused across reruns and sessions"""
+    return httpx.Client(http2=True, timeout=5.0)
+
+@st.cache_data(ttl=5, show_spinner=False)
 def get_fraud_stats():
     """Get fraud detection statistics"""
     try:
-        response = requests.get(f"{FRAUD_API_BASE}/stats", timeout=5)
+        response = get_api_client().get(f"{FRAUD_API_BASE}/stats")
         if response.status_code == 200:
             return response.json()
     except:
@@ -70,10 +75,11 @@ def get_fraud_stats():
         "system_status": "operational"
     }
 
+@st.cache_data(ttl=5, show_spinner=False)
 def get_recent_alerts():
     """Get recent fraud alerts"""
     try:
-        response = requests.get(f"{FRAUD_API_BASE}/alerts?limit=20", timeout=5)
+        response = get_api_client().get(f"{FRAUD_API_BASE}/alerts", params={"limit": 20})
         if response.status_code == 200:
             return response.json()
     except:
@@ -101,6 +107,45 @@ def get_recent_alerts():
         }
     ]
 
+# Mock chart data, as hashable tuples so the figure builders can be cached
+TREND_DATES = ('2024-03-01', '2024-03-15')
+TREND_FRAUD_COUNTS = (2, 1, 3, 0, 1, 4, 2, 1, 0, 2, 3, 1, 2, 4, 1)
+RISK_LEVELS = ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
+RISK_COUNTS = (156, 45, 12, 3)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def trend_figure(date_range, fraud_counts):
+    """Daily fraud alerts line chart, built once per distinct input"""
+    trend_df = pd.DataFrame({
+        'Date': pd.date_range(start=date_range[0], end=date_range[1], freq='D'),
+        'Fraud_Alerts': list(fraud_counts)
+    })
+    
+    fig = px.line(trend_df, x='Date', y='Fraud_Alerts', 
+                 title='Daily Fraud Alerts',
+                 markers=True)
+    fig.update_layout(height=400)
+    return fig
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def risk_distribution_figure(risk_levels, counts):
+    """Risk level pie chart, built once per distinct input"""
+    risk_data = pd.DataFrame({
+        'Risk_Level': list(risk_levels),
+        'Count': list(counts)
+    })
+    
+    fig = px.pie(risk_data, values='Count', names='Risk_Level',
+                title='Transaction Risk Levels (Last 7 Days)',
+                color_discrete_map={
+                    'LOW': 'lightgreen',
+                    'MEDIUM': 'yellow', 
+                    'HIGH': 'orange',
+                    'CRITICAL': 'red'
+                })
+    fig.update_layout(height=400)
+    return fig
+
 def create_fraud_score_gauge(score):
     """Create a gauge chart for fraud score"""
     fig = go.Figure(go.Indicator(
@@ -127,19 +172,8 @@ def create_fraud_score_gauge(score):
     fig.update_layout(height=300)
     return fig
 
-def main():
-    """Main dashboard"""
-    
-    # Header
-    st.title("🚨 Bank of Anthos Fraud Detection System")
-    st.markdown("**GKE Turns 10 Hackathon - AI-Powered Fraud Detection**")
-    
-    # Sidebar
-    st.sidebar.title("🎛️ Controls")
-    auto_refresh = st.sidebar.checkbox("Auto Refresh (5s)", value=True)
-    show_safe_transactions = st.sidebar.checkbox("Show Safe Transactions", value=False)
-    
-    # Get data
+def render_live_section():
+    """Main metrics and real-time alerts"""
     stats = get_fraud_stats()
     alerts = get_recent_alerts()
     
@@ -209,6 +243,22 @@ def main():
                 st.divider()
     else:
         st.info("No recent fraud alerts - system is monitoring transactions")
+
+def main():
+    """Main dashboard"""
+    
+    # Header
+    st.title("🚨 Bank of Anthos Fraud Detection System")
+    st.markdown("**GKE Turns 10 Hackathon - AI-Powered Fraud Detection**")
+    
+    # Sidebar
+    st.sidebar.title("🎛️ Controls")
+    auto_refresh = st.sidebar.checkbox("Auto Refresh (5s)", value=True)
+    show_safe_transactions = st.sidebar.checkbox("Show Safe Transactions", value=False)
+    
+    # Live metrics + alerts; only this fragment reruns on each refresh tick
+    live_section = st.fragment(run_every=5 if auto_refresh else None)(render_live_section)
+    live_section()
     
     # Charts section
     col1, col2 = st.columns(2)
@@ -217,39 +267,14 @@ def main():
         st.subheader("📊 Fraud Detection Trends")
         
         # Mock trend data
-        dates = pd.date_range(start='2024-03-01', end='2024-03-15', freq='D')
-        fraud_counts = [2, 1, 3, 0, 1, 4, 2, 1, 0, 2, 3, 1, 2, 4, 1]
-        
-        trend_df = pd.DataFrame({
-            'Date': dates,
-            'Fraud_Alerts': fraud_counts
-        })
-        
-        fig = px.line(trend_df, x='Date', y='Fraud_Alerts', 
-                     title='Daily Fraud Alerts',
-                     markers=True)
-        fig.update_layout(height=400)
+        fig = trend_figure(TREND_DATES, TREND_FRAUD_COUNTS)
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("🎯 Risk Level Distribution")
         
         # Mock risk level data
-        risk_data = pd.DataFrame({
-            'Risk_Level': ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'],
-            'Count': [156, 45, 12, 3],
-            'Color': ['green', 'yellow', 'orange', 'red']
-        })
-        
-        fig = px.pie(risk_data, values='Count', names='Risk_Level',
-                    title='Transaction Risk Levels (Last 7 Days)',
-                    color_discrete_map={
-                        'LOW': 'lightgreen',
-                        'MEDIUM': 'yellow', 
-                        'HIGH': 'orange',
-                        'CRITICAL': 'red'
-                    })
-        fig.update_layout(height=400)
+        fig = risk_distribution_figure(RISK_LEVELS, RISK_COUNTS)
         st.plotly_chart(fig, use_container_width=True)
     
     # Live transaction feed
@@ -301,11 +326,6 @@ def main():
     # Footer
     st.divider()
     st.markdown("**🏆 GKE Turns 10 Hackathon** - Powered by Gemini AI + GKE")
-    
-    # Auto refresh
-    if auto_refresh:
-        time.sleep(5)
-        st.rerun()
 
 if __name__ == "__main__":
     main()
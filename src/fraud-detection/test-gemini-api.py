@@ -25,8 +25,7 @@ async def test_gemini_api():
         
         # Test basic connection
         print("\n🔍 Testing basic API call...")
-        response = await asyncio.to_thread(
-            model.generate_content, 
+        response = await model.generate_content_async(
             "Hello! Please respond with 'API connection successful' to confirm you're working."
         )
         
@@ -45,7 +44,7 @@ async def test_gemini_api():
         Respond in JSON format: {"fraud_score": 0.0, "explanation": "reason"}
         """
         
-        fraud_response = await asyncio.to_thread(model.generate_content, fraud_prompt)
+        fraud_response = await model.generate_content_async(fraud_prompt)
         print(f"🔍 Fraud Analysis Response:")
         print(fraud_response.text)
         
@@ -0,0 +1,24 @@
+"""
+Shared setup for the offline unit tests
+
+Puts the service sources on sys.path so the tests import the deployed modules
+(fraud-api, fraud-monitor and the standalone agent) directly. The live tests in
+test_fraud_detection.py don't use any of this.
+"""
+
+import os
+import sys
+
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _component in ("fraud-api", "fraud-monitor", "agent"):
+    sys.path.insert(0, os.path.join(_ROOT, _component))
+
+@pytest_asyncio.fixture
+async def sqlite_engine(tmp_path):
+    """File-backed SQLite engine standing in for Postgres; its insert() has the same on_conflict_do_nothing()"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    yield engine
+    await engine.dispose()
@@ -0,0 +1,166 @@
+"""
+Offline unit tests for the standalone fraud agent
+
+Covers batched explanation splitting, the per-instance async LRU cache and
+timestamp normalization. Gemini is replaced by an in-process fake.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+
+import fraud_agent
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+def explanation_fields(amount: float) -> dict:
+    return {
+        "amount": amount, "timestamp": "2024-01-01T03:00:00Z", "account": "1011226360",
+        "overall_score": 0.8, "risk_level": "HIGH", "risk_factors": ["high_amount"],
+    }
+
+@pytest_asyncio.fixture
+async def explainers():
+    """ExplanationBatchers whose background workers are stopped after the test"""
+    created = []
+
+    def make(generate, **kwargs) -> fraud_agent.ExplanationBatcher:
+        created.append(fraud_agent.ExplanationBatcher(generate, **kwargs))
+        return created[-1]
+    yield make
+    for batcher in created:
+        if batcher._worker is not None:
+            batcher._worker.cancel()
+            await asyncio.gather(batcher._worker, return_exceptions=True)
+
+# Explanation batching
+
+@pytest.mark.asyncio
+async def test_explanation_batcher_splits_one_call_by_index(explainers):
+    prompts = []
+
+    async def generate(prompt):
+        prompts.append(prompt)
+        # Out of order, wrapped in prose, and missing index 1
+        items = [{"index": index, "explanation": f" explanation {index} "} for index in (3, 0, 2)]
+        return FakeResponse(f"Here you go:\n{json.dumps(items)}\nThanks")
+    batcher = explainers(generate, max_batch_size=8, flush_interval=0.05)
+
+    results = await asyncio.gather(
+        *(batcher.submit(explanation_fields(100.0 + index)) for index in range(4)), return_exceptions=True
+    )
+
+    assert len(prompts) == 1
+    assert all(f"[{index}] Amount: ${100 + index:.2f}" in prompts[0] for index in range(4))
+    assert [results[index] for index in (0, 2, 3)] == ["explanation 0", "explanation 2", "explanation 3"]
+    assert isinstance(results[1], ValueError)
+
+@pytest.mark.asyncio
+async def test_explanation_batcher_caps_batch_size(explainers):
+    sizes = []
+
+    async def generate(prompt):
+        count = prompt.count("] Amount:")
+        sizes.append(count)
+        return FakeResponse(json.dumps([{"index": index, "explanation": "x"} for index in range(count)]))
+    batcher = explainers(generate, max_batch_size=3, flush_interval=0.05)
+
+    await asyncio.gather(*(batcher.submit(explanation_fields(index)) for index in range(7)))
+
+    assert sorted(sizes) == [1, 3, 3]
+
+@pytest.mark.asyncio
+async def test_explanation_batcher_fails_the_whole_batch_on_a_bad_response(explainers):
+    async def generate(prompt):
+        return FakeResponse("no json here")
+    batcher = explainers(generate, flush_interval=0.01)
+
+    results = await asyncio.gather(*(batcher.submit(explanation_fields(index)) for index in range(2)),
+                                   return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+# async_lru_cache
+
+class Lookup:
+    def __init__(self):
+        self.calls = []
+
+    @fraud_agent.async_lru_cache(maxsize=2, ttl=60)
+    async def get(self, key):
+        self.calls.append(key)
+        await asyncio.sleep(0.01)
+        if key == "bad":
+            raise ValueError(key)
+        return key * 2
+
+@pytest.mark.asyncio
+async def test_async_lru_cache_single_flight():
+    lookup = Lookup()
+
+    results = await asyncio.gather(*(lookup.get("a") for _ in range(10)))
+
+    assert results == ["aa"] * 10
+    assert lookup.calls == ["a"]
+
+@pytest.mark.asyncio
+async def test_async_lru_cache_does_not_cache_failures():
+    lookup = Lookup()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await lookup.get("bad")
+
+    assert lookup.calls == ["bad", "bad"]
+
+@pytest.mark.asyncio
+async def test_async_lru_cache_is_per_instance_and_bounded():
+    first, second = Lookup(), Lookup()
+    for key in ("a", "b", "a", "c", "a", "b"):
+        await first.get(key)
+    await second.get("a")
+
+    # "b" was least recently used when "c" arrived, so it was fetched again
+    assert first.calls == ["a", "b", "c", "b"]
+    assert second.calls == ["a"]
+
+@pytest.mark.asyncio
+async def test_async_lru_cache_expires_entries(monkeypatch):
+    lookup = Lookup()
+    await lookup.get("a")
+    # Jump the clock past the TTL; it keeps running so the event loop's timers still fire
+    monotonic = fraud_agent.time.monotonic
+    monkeypatch.setattr(fraud_agent.time, "monotonic", lambda: monotonic() + 61)
+
+    await lookup.get("a")
+
+    assert lookup.calls == ["a", "a"]
+
+# Timestamps
+
+def test_timestamp_offset_from_iso_string():
+    agent = fraud_agent.FraudDetectionAgent("test-key")
+    expected = datetime(2024, 3, 16, 11, 45, tzinfo=timezone.utc)
+
+    ts_ns, offset_ns = agent._timestamp_ns_offset({"timestamp": "2024-03-16T03:45:00-08:00"})
+
+    assert ts_ns == int(expected.timestamp()) * 1_000_000_000
+    assert offset_ns == -8 * 3600 * 1_000_000_000
+
+def test_timestamp_offset_treats_naive_as_utc():
+    agent = fraud_agent.FraudDetectionAgent("test-key")
+
+    assert agent._timestamp_ns_offset({"timestamp": "2024-03-16T11:45:00"}) == agent._timestamp_ns_offset(
+        {"timestamp": "2024-03-16T11:45:00Z"}
+    )
+
+def test_timestamp_offset_prefers_ts_ns_without_parsing():
+    agent = fraud_agent.FraudDetectionAgent("test-key")
+    transaction = {"ts_ns": 1_700_000_000_000_000_000, "utc_offset_ns": 3_600_000_000_000, "timestamp": "not-a-date"}
+
+    assert agent._timestamp_ns_offset(transaction) == (1_700_000_000_000_000_000, 3_600_000_000_000)
+    assert agent._timestamp_ns_offset({"timestamp": "not-a-date"}, default=5) == (5, 0)
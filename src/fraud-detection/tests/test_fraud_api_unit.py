@@ -0,0 +1,303 @@
+"""
+Offline unit tests for the fraud-api service
+
+Covers the analysis fingerprint, the batched database writer and its row-by-row
+fallback, the agent's caches and Gemini batching, and score_batch parity with the
+per-transaction tools. No database server, Redis or Gemini access is needed.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import adk_agent
+import main
+
+def make_transaction(**overrides) -> main.TransactionData:
+    fields = dict(
+        transactionId=1, fromAccountNum="1011226360", fromRoutingNum="883745000",
+        toAccountNum="1033623433", toRoutingNum="883745000", amount=5000,
+        timestamp="2024-01-01T03:15:00Z",
+    )
+    fields.update(overrides)
+    return main.TransactionData(**fields)
+
+def analysis_rows(transaction_id: str, account: str = "1011226360") -> tuple:
+    transaction_row = {
+        "transaction_id": transaction_id, "from_account": account, "to_account": "1033623433",
+        "amount": 500000, "timestamp": datetime(2024, 1, 1), "fraud_score": 0.9,
+        "is_fraud": True, "analysis_result": "{}",
+    }
+    alert_row = {
+        "transaction_id": transaction_id, "alert_type": "FRAUD_DETECTED", "risk_level": "HIGH",
+        "confidence": 0.9, "explanation": "test",
+    }
+    return transaction_row, alert_row
+
+@pytest_asyncio.fixture
+async def api_db(sqlite_engine, monkeypatch):
+    """Point the API's writer at SQLite; a trigger rejects from_account 'BAD' like a constraint would"""
+    monkeypatch.setattr(main, "pg_insert", sqlite_insert)
+    monkeypatch.setattr(main, "AsyncSessionLocal", async_sessionmaker(sqlite_engine, expire_on_commit=False))
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(main.Base.metadata.create_all)
+        await conn.execute(text(
+            "CREATE TRIGGER reject_bad BEFORE INSERT ON transactions WHEN NEW.from_account = 'BAD' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+        ))
+    return sqlite_engine
+
+async def count_rows(engine, table: str) -> int:
+    async with engine.connect() as conn:
+        return (await conn.execute(text(f"SELECT count(*) FROM {table}"))).scalar()
+
+# Fingerprint
+
+def test_fingerprint_is_stable_within_the_hour():
+    service = main.FraudDetectionService()
+    assert service._fingerprint(make_transaction()) == service._fingerprint(
+        make_transaction(transactionId=2, timestamp="2024-01-01T03:59:59Z")
+    )
+
+@pytest.mark.parametrize("overrides", [
+    {"fromAccountNum": "1055757655"},
+    {"toAccountNum": "1077441377"},
+    {"amount": 5001},
+    {"timestamp": "2024-01-01T04:15:00Z"},
+    {"timestamp": "2024-01-02T03:15:00Z"},
+])
+def test_fingerprint_changes_with_analysis_inputs(overrides):
+    service = main.FraudDetectionService()
+    assert service._fingerprint(make_transaction()) != service._fingerprint(make_transaction(**overrides))
+
+@pytest.mark.asyncio
+async def test_unparseable_timestamp_skips_the_cache():
+    service = main.FraudDetectionService()
+    transaction = make_transaction(timestamp="not-a-date")
+    calls = []
+
+    async def analyze(transaction_dict, user_history=None):
+        calls.append(transaction_dict["transactionId"])
+        return {
+            "transaction_id": str(transaction_dict["transactionId"]), "fraud_score": 0.5,
+            "is_fraud": False, "risk_level": "MEDIUM", "confidence": 0.5, "explanation": "x",
+            "risk_factors": [], "recommendation": "REVIEW",
+        }
+    service.agent.analyze_transaction = analyze
+
+    assert service._fingerprint(transaction) is None
+    await service.analyze_transaction(transaction)
+    await service.analyze_transaction(transaction)
+    assert calls == [1, 1]
+    assert len(service.analysis_cache) == 0
+
+# Batched writes
+
+@pytest.mark.asyncio
+async def test_write_batch_skips_replayed_transactions(api_db):
+    await main._write_batch([analysis_rows("1"), analysis_rows("2")])
+    await main._write_batch([analysis_rows("2"), analysis_rows("3")])
+
+    assert await count_rows(api_db, "transactions") == 3
+    # The replayed transaction doesn't alert twice
+    assert await count_rows(api_db, "fraud_alerts") == 3
+
+@pytest.mark.asyncio
+async def test_write_batch_isolates_a_failing_row(api_db):
+    await main._write_batch([analysis_rows("1"), analysis_rows("2", account="BAD"), analysis_rows("3")])
+
+    async with api_db.connect() as conn:
+        stored = (await conn.execute(text("SELECT transaction_id FROM transactions"))).scalars().all()
+        alerted = (await conn.execute(text("SELECT transaction_id FROM fraud_alerts"))).scalars().all()
+    assert sorted(stored) == ["1", "3"]
+    assert sorted(alerted) == ["1", "3"]
+
+@pytest.mark.asyncio
+async def test_flush_loop_writes_everything_queued_before_the_sentinel(api_db):
+    queue = asyncio.Queue()
+    flusher = asyncio.create_task(main.flush_loop(queue))
+    for transaction_id in range(5):
+        await queue.put(analysis_rows(str(transaction_id)))
+    await asyncio.sleep(main.WRITE_BATCH_IDLE * 2)
+    for transaction_id in range(5, 8):
+        await queue.put(analysis_rows(str(transaction_id)))
+    await queue.put(None)
+
+    await asyncio.wait_for(flusher, 5)
+    assert await count_rows(api_db, "transactions") == 8
+
+@pytest.mark.asyncio
+async def test_execution_history_is_flushed_on_stop(api_db):
+    agent = adk_agent.FraudDetectionAgent("test-key")
+    agent.history_flush_interval = 60
+    agent.start_history_flusher(main.store_executions)
+    agent._record_execution(adk_agent.AgentContext(transaction={"transactionId": 7}), {"score": np.float64(0.5)})
+
+    await agent.stop_history_flusher()
+    async with api_db.connect() as conn:
+        transaction_id, record = (await conn.execute(
+            text("SELECT transaction_id, record FROM agent_executions")
+        )).one()
+    assert transaction_id == "7"
+    assert json.loads(record)["decision"] == {"score": 0.5}
+
+# Caches
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = adk_agent.TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+def test_ttl_cache_expires_entries():
+    cache = adk_agent.TTLCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+@pytest.mark.asyncio
+async def test_context_provider_single_flight():
+    calls = []
+
+    async def fetch(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return {"value": value}
+    provider = adk_agent.ContextProvider("test", "test provider", fetch)
+
+    results = await asyncio.gather(*(provider.get_context("key", 1) for _ in range(10)))
+    assert results == [{"value": 1}] * 10
+    assert calls == [1]
+
+    # Cached until the TTL, and keyed on the arguments too
+    await provider.get_context("key", 1)
+    await provider.get_context("key", 2)
+    assert calls == [1, 2]
+
+@pytest.mark.asyncio
+async def test_context_provider_does_not_cache_failures():
+    calls = []
+
+    async def fetch():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError("upstream down")
+        return {"ok": True}
+    provider = adk_agent.ContextProvider("test", "test provider", fetch)
+
+    assert (await provider.get_context("key"))["error"] == "upstream down"
+    assert await provider.get_context("key") == {"ok": True}
+    assert len(calls) == 2
+
+# Gemini batching
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeBatchModel:
+    """Answers multi-prompt calls out of order and leaves out the indexes in `missing`"""
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.calls = []
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls.append(generation_config)
+        if generation_config is None:
+            return FakeResponse(json.dumps({"answer": "single"}))
+        count = prompt.count("\n[")
+        return FakeResponse(json.dumps([
+            {"index": index, "answer": index} for index in reversed(range(count)) if index not in self.missing
+        ]))
+
+@pytest_asyncio.fixture
+async def batchers():
+    """GeminiBatchers whose background workers are stopped after the test"""
+    created = []
+
+    def make(**kwargs) -> adk_agent.GeminiBatcher:
+        created.append(adk_agent.GeminiBatcher("test-model", **kwargs))
+        return created[-1]
+    yield make
+    for batcher in created:
+        if batcher._worker is not None:
+            batcher._worker.cancel()
+            await asyncio.gather(batcher._worker, return_exceptions=True)
+
+@pytest.mark.asyncio
+async def test_gemini_batcher_splits_one_call_by_index(monkeypatch, batchers):
+    model = FakeBatchModel(missing={2})
+    monkeypatch.setattr(adk_agent, "_get_model", lambda model_name: model)
+    batcher = batchers(max_size=8, wait_ms=50)
+
+    results = await asyncio.gather(*(batcher.submit(f"prompt {i}") for i in range(5)), return_exceptions=True)
+
+    assert model.calls == [adk_agent.BATCH_GENERATION_CONFIG]
+    assert [json.loads(results[i]) for i in (0, 1, 3, 4)] == [{"answer": i} for i in (0, 1, 3, 4)]
+    assert isinstance(results[2], ValueError)
+
+@pytest.mark.asyncio
+async def test_gemini_batcher_sends_a_lone_prompt_as_is(monkeypatch, batchers):
+    model = FakeBatchModel()
+    monkeypatch.setattr(adk_agent, "_get_model", lambda model_name: model)
+    batcher = batchers(wait_ms=1)
+
+    assert json.loads(await batcher.submit("prompt")) == {"answer": "single"}
+    assert model.calls == [None]
+
+# score_batch parity
+
+PARITY_TRANSACTIONS = [
+    {"transactionId": 1, "amount": 450, "timestamp": "2024-01-03T12:30:00Z"},
+    {"transactionId": 2, "amount": 50, "timestamp": "2024-01-06T03:15:00Z"},
+    {"transactionId": 3, "amount": 100000, "timestamp": "2024-01-07T14:00:00Z"},
+    {"transactionId": 4, "amount": 250000, "timestamp": "2024-01-04T23:45:00Z"},
+    {"transactionId": 5, "amount": 600000, "timestamp": "2024-01-02T05:00:00Z"},
+    {"transactionId": 6, "amount": 99, "timestamp": "2024-01-05T08:00:00Z"},
+    {"transactionId": 7, "amount": 123456, "timestamp": "2024-01-06T18:20:00Z"},
+]
+
+@pytest.mark.asyncio
+async def test_score_batch_matches_per_transaction_tools():
+    agent = adk_agent.FraudDetectionAgent("test-key")
+    tools = {
+        "transaction_amount_analysis": agent.analyze_transaction_amount,
+        "temporal_pattern_analysis": agent.analyze_temporal_patterns,
+        "behavioral_deviation_analysis": agent.analyze_behavioral_deviation,
+        "velocity_fraud_detection": agent.analyze_velocity_fraud,
+    }
+
+    expected = {name: [] for name in tools}
+    columns = {name: [] for name in adk_agent.TransactionBatch.__dataclass_fields__}
+    for transaction in PARITY_TRANSACTIONS:
+        behavior = await agent._get_user_behavior_context(transaction)
+        context = adk_agent.AgentContext(transaction=transaction, external_context={"user_behavior": behavior})
+        for name, run in tools.items():
+            expected[name].append((await run(context))["risk_score"])
+
+        timestamp = datetime.fromisoformat(transaction["timestamp"].replace("Z", "+00:00"))
+        columns["amount"].append(transaction["amount"] / 100.0)
+        columns["hour"].append(timestamp.hour)
+        columns["is_weekend"].append(timestamp.weekday() >= 5)
+        columns["user_avg"].append(behavior["average_transaction_amount"])
+        columns["recent_count"].append(behavior["recent_transaction_count"])
+        columns["unusual_hour"].append(timestamp.hour not in behavior["typical_transaction_hours"])
+        columns["knows_category"].append("electronics" in behavior["frequent_merchants"])
+
+    scores = adk_agent.FraudDetectionAgent.score_batch(
+        adk_agent.TransactionBatch(**{name: np.array(values) for name, values in columns.items()})
+    )
+    for name in tools:
+        np.testing.assert_allclose(scores[name], expected[name], err_msg=name)
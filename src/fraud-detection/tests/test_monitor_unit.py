@@ -0,0 +1,163 @@
+"""
+Offline unit tests for the transaction monitor
+
+Covers discovery deduplication (Bloom filter plus recent-id LRU), the batched
+bookkeeping writer and the flush on shutdown. Bank of Anthos is served by an
+httpx mock transport and Postgres by SQLite.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, async_scoped_session
+
+import transaction_monitor as tm
+
+def bank_transaction(transaction_id: int, from_account: str, to_account: str) -> dict:
+    return {
+        "transactionId": transaction_id, "fromAccountNum": from_account, "fromRoutingNum": "883745000",
+        "toAccountNum": to_account, "toRoutingNum": "883745000", "amount": 1000,
+        "timestamp": "2024-01-01T12:00:00Z",
+    }
+
+class FakeBank:
+    """Serves /login and /transactions/<account> from a per-account dict"""
+    def __init__(self):
+        self.transactions = {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/login":
+            return httpx.Response(200, json={"token": "test-token"})
+        if request.url.path.startswith("/transactions/"):
+            account_id = request.url.path.rsplit("/", 1)[1]
+            return httpx.Response(200, json=self.transactions.get(account_id, []))
+        return httpx.Response(404)
+
+@pytest_asyncio.fixture
+async def monitor_db(sqlite_engine, monkeypatch):
+    """Point the monitor's engine, scoped sessions and upsert at SQLite"""
+    get_session = async_scoped_session(
+        async_sessionmaker(sqlite_engine, autoflush=False, expire_on_commit=False),
+        scopefunc=asyncio.current_task
+    )
+    monkeypatch.setattr(tm, "engine", sqlite_engine)
+    monkeypatch.setattr(tm, "get_session", get_session)
+    monkeypatch.setattr(tm, "pg_insert", sqlite_insert)
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(tm.Base.metadata.create_all)
+    return sqlite_engine
+
+@pytest_asyncio.fixture
+async def monitor(monitor_db):
+    bank = FakeBank()
+    monitor = tm.TransactionMonitor()
+    await monitor.bank_client.aclose()
+    monitor.bank_client.client = httpx.AsyncClient(transport=httpx.MockTransport(bank))
+    monitor.bank = bank
+    yield monitor
+    await monitor.bank_client.aclose()
+    await monitor.fraud_client.aclose()
+
+async def discover(monitor) -> list:
+    """One discovery pass, releasing the task's session the way a poll tick does"""
+    try:
+        return await monitor.discover_new_transactions()
+    finally:
+        await tm.get_session.remove()
+
+async def stored_rows(engine) -> dict:
+    async with engine.connect() as conn:
+        rows = await conn.execute(text(
+            "SELECT transaction_id, processed, fraud_analysis_sent FROM monitored_transactions"
+        ))
+        return {transaction_id: (bool(processed), bool(sent)) for transaction_id, processed, sent in rows}
+
+# Deduplication
+
+def test_remember_transaction_evicts_oldest_but_keeps_bloom(monkeypatch):
+    monkeypatch.setattr(tm, "KNOWN_CACHE_SIZE", 2)
+    monitor = tm.TransactionMonitor()
+    for transaction_id in ("1", "2", "1", "3"):
+        monitor.remember_transaction(transaction_id)
+
+    assert list(monitor.known_recent) == ["1", "3"]
+    assert all(transaction_id in monitor.known_bloom for transaction_id in ("1", "2", "3"))
+
+@pytest.mark.asyncio
+async def test_discovery_deduplicates_across_accounts_and_polls(monitor):
+    testuser, alice = monitor.demo_accounts[:2]
+    # A transfer between two demo accounts is listed under both
+    monitor.bank.transactions = {
+        testuser: [bank_transaction(1, testuser, alice), bank_transaction(2, testuser, "9999999999")],
+        alice: [bank_transaction(1, testuser, alice), bank_transaction(3, alice, "9999999999")],
+    }
+
+    first = await discover(monitor)
+    second = await discover(monitor)
+
+    assert sorted(payload["transactionId"] for payload in first) == [1, 2, 3]
+    assert second == []
+    assert monitor._write_q.qsize() == 3
+
+@pytest.mark.asyncio
+async def test_discovery_skips_stored_ids_outside_the_recent_cache(monitor, monitor_db):
+    testuser = monitor.demo_accounts[0]
+    async with monitor_db.begin() as conn:
+        await conn.execute(tm.MonitoredTransaction.__table__.insert(), [{"transaction_id": "1", "account_id": testuser}])
+    # Known to the Bloom filter only, as after a restart
+    monitor.known_bloom.add("1")
+    monitor.bank.transactions = {
+        testuser: [bank_transaction(1, testuser, "9999999999"), bank_transaction(2, testuser, "9999999999")],
+    }
+
+    discovered = await discover(monitor)
+
+    assert [payload["transactionId"] for payload in discovered] == [2]
+    assert "1" in monitor.known_recent
+
+# Bookkeeping writes
+
+@pytest.mark.asyncio
+async def test_write_batch_stores_then_marks(monitor, monitor_db):
+    await monitor._write_batch([
+        ("store", "1", "1011226360"), ("store", "2", "1011226360"), ("store", "3", "1011226360"),
+        ("mark", "1", True), ("mark", "2", False),
+    ])
+    # A replayed store is skipped rather than failing the batch
+    await monitor._write_batch([("store", "3", "1011226360"), ("mark", "3", True)])
+
+    assert await stored_rows(monitor_db) == {"1": (True, True), "2": (True, False), "3": (True, True)}
+
+@pytest.mark.asyncio
+async def test_failed_stores_do_not_drop_marks(monitor, monitor_db):
+    await monitor._write_batch([("store", "1", "1011226360")])
+    async with monitor_db.begin() as conn:
+        await conn.execute(text(
+            "CREATE TRIGGER reject_bad BEFORE INSERT ON monitored_transactions WHEN NEW.account_id = 'BAD' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+        ))
+
+    await monitor._write_batch([("store", "2", "BAD"), ("mark", "1", True)])
+
+    assert await stored_rows(monitor_db) == {"1": (True, True)}
+
+@pytest.mark.asyncio
+async def test_shutdown_flushes_queued_writes(monitor, monitor_db):
+    await monitor.initialize()
+    for transaction_id in range(20):
+        await monitor._write_q.put(("store", str(transaction_id), "1011226360"))
+    # The marks arrive while the writer is still collecting the stores into a batch
+    await asyncio.sleep(0.05)
+    for transaction_id in range(5):
+        await monitor._write_q.put(("mark", str(transaction_id), True))
+
+    await monitor.shutdown()
+
+    rows = await stored_rows(monitor_db)
+    assert len(rows) == 20
+    assert sum(processed for processed, _ in rows.values()) == 5
+    assert monitor._writer.done()